@@ -1,5 +1,11 @@
+import asyncio
+import sys
+import time
+from collections import deque
 from contextlib import asynccontextmanager
+from typing import Any
 
+import orjson
 import uvicorn
 from fastapi import APIRouter, FastAPI, WebSocket, WebSocketDisconnect, status as c
 from fastapi.middleware.cors import CORSMiddleware
@@ -7,8 +13,9 @@ from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
 from .conf import config
-from .conn import BLEHRSConnection, HRMData
-from .log import LOGGING_CONFIG
+from .conn import BLEHRSConnection
+from .data import HRMData
+from .log import LOGGING_CONFIG, logger
 from .main import init
 
 
@@ -50,6 +57,82 @@ class WsHRMData(BaseModel):
     s: bool | None
 
 
+# models above only document the message shapes,
+# messages are dumped with orjson directly to skip model construction
+type WsMessage = dict[str, Any]
+
+
+class _WsSendBuffer:
+    """Per-connection send buffer with a bound on pending data samples.
+
+    When full, the oldest data sample is dropped, state messages are always kept.
+    """
+
+    def __init__(self, max_data: int) -> None:
+        self.max_data = max_data
+        self.dropped = 0
+        self._buf = deque[tuple[bool, WsMessage]]()
+        self._data_count = 0
+        self._event = asyncio.Event()
+
+    def put_state(self, msg: WsMessage):
+        self._buf.append((False, msg))
+        self._event.set()
+
+    def put_data(self, msg: WsMessage):
+        if self._data_count >= self.max_data:
+            # state messages are rare, so the oldest sample is near the front
+            for i, (is_data, _) in enumerate(self._buf):
+                if is_data:
+                    del self._buf[i]
+                    break
+            self._data_count -= 1
+            self.dropped += 1
+        self._buf.append((True, msg))
+        self._data_count += 1
+        self._event.set()
+
+    async def _wait(self):
+        self._event.clear()
+        await self._event.wait()
+
+    async def get_batch(self, max_batch: int, flush_interval: float) -> list[WsMessage]:
+        """Wait for messages, then up to `flush_interval` more to fill a batch."""
+        while not self._buf:
+            await self._wait()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + flush_interval
+        while len(self._buf) < max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                await asyncio.wait_for(self._wait(), timeout)
+            except TimeoutError:
+                break
+
+        batch: list[WsMessage] = []
+        for _ in range(min(max_batch, len(self._buf))):
+            is_data, msg = self._buf.popleft()
+            if is_data:
+                self._data_count -= 1
+            batch.append(msg)
+        return batch
+
+
+async def _ws_writer(ws: WebSocket, buf: _WsSendBuffer):
+    """Coalesce buffered messages into one JSON array frame per flush."""
+    while True:
+        batch = await buf.get_batch(
+            config.server_ws_max_batch,
+            config.server_ws_flush_interval,
+        )
+        if buf.dropped:
+            logger.warning(f"WebSocket client too slow, dropped {buf.dropped} samples")
+            buf.dropped = 0
+        await ws.send_text(orjson.dumps(batch).decode())
+
+
 @api_router.websocket("/ws")
 async def _(ws: WebSocket):
     conn: BLEHRSConnection = ws.app.state.conn
@@ -59,19 +142,25 @@ async def _(ws: WebSocket):
         return
 
     await ws.accept()
-    await ws.send_text(
-        WsHRMConnectionState(connected=conn.connected).model_dump_json(),
-    )
+
+    # data timestamps are monotonic ns, clients expect wall-clock seconds
+    wall_offset = time.time_ns() - time.monotonic_ns()
+
+    buf = _WsSendBuffer(config.server_ws_max_pending)
+    put_state = buf.put_state
+    put_data = buf.put_data
+    put_state({"connected": conn.connected})
+    writer = asyncio.create_task(_ws_writer(ws, buf))
 
     async def _prepared(_: BLEHRSConnection):
-        await ws.send_text(WsHRMConnectionState(connected=True).model_dump_json())
+        put_state({"connected": True})
 
     async def _lost(_: BLEHRSConnection):
-        await ws.send_text(WsHRMConnectionState(connected=False).model_dump_json())
+        put_state({"connected": False})
 
-    async def _data(_: BLEHRSConnection, data: HRMData, t: float):
+    async def _data(_: BLEHRSConnection, data: HRMData, t: int):
         r, s = data
-        await ws.send_text(WsHRMData(t=t, r=r, s=s).model_dump_json())
+        put_data({"t": (t + wall_offset) / 1e9, "r": r, "s": s})
 
     async def _shutting_down(_: BLEHRSConnection):
         await ws.close(
@@ -95,7 +184,9 @@ async def _(ws: WebSocket):
         pass
     finally:
         for sig, handler in slots:
-            sig.slots.remove(handler)
+            sig.disconnect(handler)
+        writer.cancel()
+        await asyncio.gather(writer, return_exceptions=True)
 
 
 app.include_router(api_router)
@@ -112,5 +203,12 @@ def run():
         app,
         host=config.server_host,
         port=config.server_port,
+        loop="auto" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        ws="websockets-sansio",
+        # payloads are tiny, compressing them only costs CPU
+        ws_per_message_deflate=False,
+        server_header=False,
+        date_header=False,
         log_config=LOGGING_CONFIG,
     )
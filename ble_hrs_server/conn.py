@@ -1,17 +1,51 @@
 import asyncio
-import time
 from abc import ABC, abstractmethod
 from collections.abc import AsyncIterator, Callable, Coroutine
-from typing import Any, NamedTuple, Self, override
+from time import monotonic_ns
+from typing import Any, Self, override
 
 from bleak import BleakClient, BleakScanner
-from cookit import Signal, safe_exc_handler
+from cookit import Signal, default_exc_handler, safe_exc_handler
 
+from .data import HRM_UUID, HRS_UUID, HRMData, parse_hrm_pkg
 from .log import logger
 
 type Co[T] = Coroutine[Any, Any, T]
 
 
+class DictSignal[**A, R, E](Signal[A, R, E]):
+    """Signal keeping its slots in an insertion-ordered dict for O(1) disconnect."""
+
+    def __init__(
+        self,
+        exc_handler: Callable[[Self, Exception], Co[E]] = default_exc_handler,
+    ) -> None:
+        super().__init__(exc_handler)
+        self.slots: dict[Callable[A, Co[R]], None] = {}  # pyright: ignore[reportIncompatibleVariableOverride]
+
+    @override
+    def connect(self, slot: Callable[A, Co[R]]) -> Callable[A, Co[R]]:
+        self.slots[slot] = None
+        return slot
+
+    def disconnect(self, slot: Callable[A, Co[R]]) -> None:
+        self.slots.pop(slot, None)
+
+    @override
+    async def sequential(self, *args: A.args, **kwargs: A.kwargs) -> list[R | E]:
+        # slots may disconnect themselves while we are awaiting
+        return [await self.run(slot, *args, **kwargs) for slot in tuple(self.slots)]
+
+    def emit(self, *args: A.args, **kwargs: A.kwargs) -> asyncio.Task | None:
+        """Like `task_gather`, but skips `asyncio.gather` for zero or one slot."""
+        if not self.slots:
+            return None
+        if len(self.slots) == 1:
+            slot = next(iter(self.slots))
+            return asyncio.create_task(self.run(slot, *args, **kwargs))
+        return self.task_gather(*args, **kwargs)
+
+
 class BaseBLEConnection(ABC):
     def __init__(
         self,
@@ -28,16 +62,22 @@ class BaseBLEConnection(ABC):
 
         self.client: BleakClient | None = None
 
-        self._disconnected_event = asyncio.Event()
+        # bumped on every disconnect, waiters compare against the value they saw
+        # so a disconnect happening before they start waiting is not missed
+        self._disc_gen = 0
+        self._disc_cond = asyncio.Condition()
+        self._loop: asyncio.AbstractEventLoop | None = None
         self._reconnect_task: asyncio.Task | None = None
 
-        self.connect_failed_sig = Signal[[Self, Exception], Any, Any](sig_exc_handler)
-        self.connection_lost_sig = Signal[[Self], Any, Any](sig_exc_handler)
-        self.connecting_sig = Signal[[Self], Any, Any](sig_exc_handler)
-        self.connected_sig = Signal[[Self], Any, Any](sig_exc_handler)
-        self.prepared_sig = Signal[[Self], Any, Any](sig_exc_handler)
-        self.starting_sig = Signal[[Self], Any, Any](sig_exc_handler)
-        self.shutting_down_sig = Signal[[Self], Any, Any](sig_exc_handler)
+        self.connect_failed_sig = DictSignal[[Self, Exception], Any, Any](
+            sig_exc_handler,
+        )
+        self.connection_lost_sig = DictSignal[[Self], Any, Any](sig_exc_handler)
+        self.connecting_sig = DictSignal[[Self], Any, Any](sig_exc_handler)
+        self.connected_sig = DictSignal[[Self], Any, Any](sig_exc_handler)
+        self.prepared_sig = DictSignal[[Self], Any, Any](sig_exc_handler)
+        self.starting_sig = DictSignal[[Self], Any, Any](sig_exc_handler)
+        self.shutting_down_sig = DictSignal[[Self], Any, Any](sig_exc_handler)
 
     @property
     def started(self) -> bool:
@@ -47,9 +87,25 @@ class BaseBLEConnection(ABC):
     def connected(self) -> bool:
         return (self.client is not None) and self.client.is_connected
 
-    def _disconnected_callback(self, _client: BleakClient):
-        self._disconnected_event.set()
-        self._disconnected_event.clear()
+    def _disconnected_callback(self, client: BleakClient):
+        # backends may call this outside the event loop thread
+        if self._loop:
+            self._loop.call_soon_threadsafe(self._bump_disc, client)
+
+    def _bump_disc(self, client: BleakClient):
+        # ignore late callbacks from clients we already replaced
+        if client is not self.client:
+            return
+        self._disc_gen += 1
+        asyncio.create_task(self._notify_disc())
+
+    async def _notify_disc(self):
+        async with self._disc_cond:
+            self._disc_cond.notify_all()
+
+    async def _wait_disc(self, seen: int):
+        async with self._disc_cond:
+            await self._disc_cond.wait_for(lambda: self._disc_gen != seen)
 
     def new_client(self) -> BleakClient:
         return BleakClient(
@@ -65,24 +121,25 @@ class BaseBLEConnection(ABC):
         while True:
             if self.client and self.client.is_connected:
                 await self.client.disconnect()
+            seen_disc_gen = self._disc_gen
             self.client = self.new_client()
 
             if not self.client.is_connected:
-                self.connecting_sig.task_gather(self)
+                self.connecting_sig.emit(self)
                 try:
                     await self.client.connect()
                 except Exception as e:
-                    self.connect_failed_sig.task_gather(self, e)
+                    self.connect_failed_sig.emit(self, e)
                     await asyncio.sleep(self.retry_interval)
                     continue
-            self.connected_sig.task_gather(self)
+            self.connected_sig.emit(self)
 
             await self._prepare(self.client)
-            self.prepared_sig.task_gather(self)
+            self.prepared_sig.emit(self)
 
-            await self._disconnected_event.wait()
+            await self._wait_disc(seen_disc_gen)
             self.client = None
-            self.connection_lost_sig.task_gather(self)
+            self.connection_lost_sig.emit(self)
 
             await asyncio.sleep(self.retry_interval)
 
@@ -90,8 +147,9 @@ class BaseBLEConnection(ABC):
         if self.started:
             raise RuntimeError("Connection is already started")
 
-        self.starting_sig.task_gather(self)
+        self.starting_sig.emit(self)
 
+        self._loop = asyncio.get_running_loop()
         self._reconnect_task = asyncio.create_task(self._reconnect_task_func())
         try:
             await self._reconnect_task
@@ -99,7 +157,7 @@ class BaseBLEConnection(ABC):
             await self.shutdown()
 
     async def shutdown(self):
-        self.shutting_down_sig.task_gather(self)
+        self.shutting_down_sig.emit(self)
 
         if self._reconnect_task:
             self._reconnect_task.cancel()
@@ -138,32 +196,21 @@ class BaseBLEConnection(ABC):
         return False
 
 
-HRS_UUID = "0000180d-0000-1000-8000-00805f9b34fb"
-HRM_UUID = "00002a37-0000-1000-8000-00805f9b34fb"
-
-
-async def scan_hrs_supported_devices(delay: float = 2.0):
-    async with BleakScanner(service_uuids=[HRS_UUID]) as scanner:
+async def scan_hrs_supported_devices(
+    delay: float = 2.0,
+) -> list[tuple[str | None, str | None, str]]:
+    """Return `(local_name, name, address)` of discovered devices."""
+    # active scanning requests scan responses, devices show up quicker
+    # at the cost of a bit more radio usage
+    async with BleakScanner(
+        service_uuids=[HRS_UUID],
+        scanning_mode="active",
+    ) as scanner:
         await asyncio.sleep(delay)
-    return list(scanner.discovered_devices_and_advertisement_data.values())
-
-
-class HRMData(NamedTuple):
-    heart_rate: int
-    sensor_contact: bool | None
-
-
-def parse_hrm_pkg(pkg: bytearray) -> HRMData:
-    flag = pkg[0]
-    rate_is_u16 = (flag & 0b00001) != 0
-    sensor_contact_supported = (flag & 0b00100) != 0
-    sensor_contact = ((flag & 0b00010) != 0) if sensor_contact_supported else None
-
-    heart_rate = pkg[1]
-    if rate_is_u16:
-        heart_rate |= pkg[2] << 8
-
-    return HRMData(heart_rate, sensor_contact)
+    return [
+        (adv.local_name, device.name, device.address)
+        for device, adv in scanner.discovered_devices_and_advertisement_data.values()
+    ]
 
 
 class BLEHRSConnection(BaseBLEConnection):
@@ -182,47 +229,78 @@ class BLEHRSConnection(BaseBLEConnection):
             sig_exc_handler=sig_exc_handler,
             **client_kw,
         )
-        self.data_received_sig = Signal[[Self, HRMData, float], Any, Any](
+        self.data_received_sig = DictSignal[[Self, HRMData, int], Any, Any](
             sig_exc_handler,
         )
 
-    def _notify_callback_func(self, _, val: bytearray):  # noqa: ANN001
-        if not self.data_received_sig.slots:
-            return
-        t = time.time()
-        data = parse_hrm_pkg(val)
-        self.data_received_sig.task_gather(self, data, t)
+    def _new_notify_callback(self) -> Callable[[Any, bytearray], None]:
+        # called for every BLE notification, so everything it touches is bound
+        # to closure locals here instead of being looked up on `self` each time
+        slots = self.data_received_sig.slots
+        emit = self.data_received_sig.emit
+        parse = parse_hrm_pkg
+        now = monotonic_ns
+
+        # adjacent packets are usually identical, skip parsing those
+        last_pkg: bytes | None = None
+        last_data: HRMData | None = None
+
+        def callback(_, val: bytearray):  # noqa: ANN001
+            nonlocal last_pkg, last_data
+            if not slots:
+                return
+            t = now()
+            data = last_data
+            if data is None or val != last_pkg:
+                data = last_data = parse(val)
+                last_pkg = bytes(val)
+            emit(self, data, t)
+
+        return callback
 
     @override
     async def _prepare(self, client: BleakClient):
         hrm_char = client.services.get_characteristic(HRM_UUID)
         if not hrm_char:
             raise RuntimeError("Device does not support HRM")
-        await client.start_notify(hrm_char, self._notify_callback_func)
+        await client.start_notify(hrm_char, self._new_notify_callback())
 
-    async def iter(self) -> AsyncIterator[tuple[HRMData, float]]:
+    async def iter(self, maxsize: int = 64) -> AsyncIterator[tuple[HRMData, int]]:
         if not self.connected:
             return
 
-        queue = asyncio.Queue[tuple[HRMData, float] | None]()
+        # samples only describe the current state, so a slow consumer
+        # gets the newest ones and the oldest are dropped
+        queue = asyncio.Queue[tuple[HRMData, int] | None](maxsize)
+        dropped = 0
+
+        def _put(x: tuple[HRMData, int] | None):
+            nonlocal dropped
+            if queue.full():
+                queue.get_nowait()
+                dropped += 1
+            queue.put_nowait(x)
 
         @self.data_received_sig.connect
-        async def _recv(_: Self, data: HRMData, t: float):
-            await queue.put((data, t))
+        async def _recv(_: Self, data: HRMData, t: int):
+            _put((data, t))
 
         @self.connection_lost_sig.connect
         async def _lost(_: Self):
-            await queue.put(None)
+            _put(None)
 
         try:
             while True:
                 x = await queue.get()
+                if dropped:
+                    logger.warning(f"Consumer too slow, dropped {dropped} samples")
+                    dropped = 0
                 if x is None:
                     return
                 yield x
         finally:
-            self.data_received_sig.slots.remove(_recv)
-            self.connection_lost_sig.slots.remove(_lost)
+            self.data_received_sig.disconnect(_recv)
+            self.connection_lost_sig.disconnect(_lost)
 
     def __aiter__(self):
         return self.iter()
@@ -0,0 +1,31 @@
+import struct
+from typing import NamedTuple
+
+HRS_UUID = "0000180d-0000-1000-8000-00805f9b34fb"
+HRM_UUID = "00002a37-0000-1000-8000-00805f9b34fb"
+
+
+class HRMData(NamedTuple):
+    heart_rate: int
+    sensor_contact: bool | None
+
+
+# flag -> (rate_is_u16, sensor_contact), precomputed for every possible flag byte
+# bit 0: heart rate value format is u16
+# bit 1: sensor contact detected, only meaningful when bit 2 (supported) is set
+_FLAG_TABLE: tuple[tuple[bool, bool | None], ...] = tuple(
+    ((f & 0b00001) != 0, ((f & 0b00010) != 0) if (f & 0b00100) else None)
+    for f in range(256)
+)
+
+
+# skips the flag byte, reads the little-endian u16 heart rate after it
+_unpack_u16_rate = struct.Struct("<xH").unpack_from
+_make_hrm_data = HRMData._make
+
+
+def parse_hrm_pkg(pkg: bytearray) -> HRMData:
+    rate_is_u16, sensor_contact = _FLAG_TABLE[pkg[0]]
+    heart_rate = _unpack_u16_rate(pkg)[0] if rate_is_u16 else pkg[1]
+    # `_make` skips the keyword handling of the generated `__new__`
+    return _make_hrm_data((heart_rate, sensor_contact))
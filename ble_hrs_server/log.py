@@ -1,4 +1,3 @@
-import inspect
 import logging
 import sys
 
@@ -15,6 +14,10 @@ logger_id = logger.add(
     level=config.log_level,
     diagnose=False,
 )
+logger_level_no = logger.level(config.log_level).no
+
+_LOGGING_FILE = logging.__file__
+_getframe = sys._getframe  # noqa: SLF001
 
 
 # https://loguru.readthedocs.io/en/stable/overview.html#entirely-compatible-with-standard-logging
@@ -25,8 +28,9 @@ class LoguruHandler(logging.Handler):
         except ValueError:
             level = record.levelno
 
-        frame, depth = inspect.currentframe(), 0
-        while frame and (depth == 0 or frame.f_code.co_filename == logging.__file__):
+        # skip this method itself, then the `logging` internals that called it
+        frame, depth = _getframe(1), 1
+        while frame and frame.f_code.co_filename == _LOGGING_FILE:
             frame = frame.f_back
             depth += 1
 
@@ -43,7 +47,8 @@ LOGGING_CONFIG = {
         "default": {"class": "ble_hrs_server.log.LoguruHandler"},
     },
     "loggers": {
-        "uvicorn.error": {"handlers": ["default"], "level": "DEBUG"},
-        "uvicorn.access": {"handlers": ["default"], "level": "DEBUG"},
+        # filter by level before records reach the handler and its frame walk
+        "uvicorn.error": {"handlers": ["default"], "level": logger_level_no},
+        "uvicorn.access": {"handlers": ["default"], "level": logger_level_no},
     },
 }
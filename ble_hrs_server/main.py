@@ -2,7 +2,7 @@ import asyncio
 import traceback
 from typing import TYPE_CHECKING
 
-from .conf import config
+from .conf import config, config_manager
 from .conn import BLEHRSConnection, scan_hrs_supported_devices
 from .log import logger
 
@@ -23,14 +23,12 @@ async def select_device():
         return None
 
     logger.success("Supported devices found:")
-    for i, (device, adv) in enumerate(devices, 1):
-        logger.success(
-            f"{i}: {adv.local_name or device.name or 'Unknown'} ({device.address})",
-        )
+    for i, (local_name, name, address) in enumerate(devices, 1):
+        logger.success(f"{i}: {local_name or name or 'Unknown'} ({address})")
 
     if len(devices) == 1:
         logger.info("Only one device found, automatically selecting it")
-        return devices[0][0].address
+        return devices[0][2]
 
     while True:
         logger.info("Select a device by number: ")
@@ -41,7 +39,7 @@ async def select_device():
 
         choice = int(choice) - 1
         if 0 <= choice < len(devices):
-            return devices[choice][0].address
+            return devices[choice][2]
         logger.error("Invalid choice")
 
 
@@ -96,8 +94,8 @@ async def construct_available_conn(address: str) -> BLEHRSConnection | None:
     asyncio.create_task(conn.start())
 
     if await first_conn_ok_fut:
-        conn.prepared_sig.slots.remove(_prepared)
-        conn.connect_failed_sig.slots.remove(_failed)
+        conn.prepared_sig.disconnect(_prepared)
+        conn.connect_failed_sig.disconnect(_failed)
         return conn
 
     await conn.shutdown()
@@ -121,7 +119,7 @@ async def init():
         conn = await construct_available_conn(address)
         if conn:
             config.last_device_address = address
-            config.save()
+            config_manager.save()
             break
         logger.error("Cannot connect to this device, please re-select one")
 
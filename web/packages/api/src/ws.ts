@@ -17,7 +17,7 @@ export type ws = {
     path: never
     params: never
     send: never
-    recv: WsHRMConnectionState | WsHRMData
+    recv: (WsHRMConnectionState | WsHRMData)[]
   }
 }
 